@@ -0,0 +1,59 @@
+import hashlib
+import re
+import sqlite3
+import time
+
+# Default time-to-live for cached answers: one week
+_DEFAULT_TTL = 86400 * 7
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    """Lowercase, strip punctuation and collapse whitespace in a query."""
+    return _WS_RE.sub(" ", _PUNCT_RE.sub("", query.lower())).strip()
+
+
+class AnswerCache:
+    """Persistent query/answer cache keyed on the normalized query.
+
+    Repeated (or trivially re-phrased) questions skip retrieval and LLM
+    generation entirely and answer from sqlite instead.
+    """
+
+    def __init__(self, cache_path="./answer_cache.sqlite3"):
+        self._conn = sqlite3.connect(cache_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answer_cache "
+            "(key TEXT PRIMARY KEY, answer TEXT, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def _key(self, query):
+        return hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()
+
+    def get(self, query):
+        """Return the cached answer for a query, or None on miss/expiry."""
+        row = self._conn.execute(
+            "SELECT answer, expires_at FROM answer_cache WHERE key = ?",
+            (self._key(query),),
+        ).fetchone()
+        if row is None:
+            return None
+        answer, expires_at = row
+        if expires_at < time.time():
+            self._conn.execute(
+                "DELETE FROM answer_cache WHERE key = ?", (self._key(query),)
+            )
+            self._conn.commit()
+            return None
+        return answer
+
+    def set(self, query, answer, ttl=_DEFAULT_TTL):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO answer_cache (key, answer, expires_at) "
+            "VALUES (?, ?, ?)",
+            (self._key(query), answer, time.time() + ttl),
+        )
+        self._conn.commit()
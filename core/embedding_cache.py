@@ -0,0 +1,75 @@
+from langchain_core.embeddings import Embeddings
+import hashlib
+import numpy as np
+import sqlite3
+
+
+class CachedEmbeddings(Embeddings):
+    """Wrap an embedding model with a persistent per-text vector cache.
+
+    Vectors are keyed on ``sha256(model_id + text)`` in a sqlite kv table,
+    so rebuilding the store only re-embeds chunks whose content actually
+    changed instead of the whole corpus.
+    """
+
+    def __init__(self, inner, model_id=None, cache_path="./embedding_cache.sqlite3"):
+        self.inner = inner
+        self.model_id = model_id or getattr(inner, "model", type(inner).__name__)
+        self._conn = sqlite3.connect(cache_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embedding_cache (key TEXT PRIMARY KEY, vec BLOB)"
+        )
+        self._conn.commit()
+
+    def _key(self, text):
+        return hashlib.sha256((self.model_id + text).encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys):
+        """Return {key: vector} for the keys already in the cache."""
+        found = {}
+        for key in keys:
+            row = self._conn.execute(
+                "SELECT vec FROM embedding_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                found[key] = np.frombuffer(row[0], dtype=np.float32).tolist()
+        return found
+
+    def _store(self, keys, vectors):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embedding_cache (key, vec) VALUES (?, ?)",
+            [
+                (key, np.asarray(vec, dtype=np.float32).tobytes())
+                for key, vec in zip(keys, vectors)
+            ],
+        )
+        self._conn.commit()
+
+    def embed_documents(self, texts):
+        keys = [self._key(t) for t in texts]
+        found = self._lookup(keys)
+
+        missing = [(k, t) for k, t in zip(keys, texts) if k not in found]
+        if missing:
+            missing_keys = [k for k, _ in missing]
+            new_vectors = self.inner.embed_documents([t for _, t in missing])
+            self._store(missing_keys, new_vectors)
+            found.update(zip(missing_keys, new_vectors))
+
+        return [found[k] for k in keys]
+
+    async def aembed_documents(self, texts):
+        keys = [self._key(t) for t in texts]
+        found = self._lookup(keys)
+
+        missing = [(k, t) for k, t in zip(keys, texts) if k not in found]
+        if missing:
+            missing_keys = [k for k, _ in missing]
+            new_vectors = await self.inner.aembed_documents([t for _, t in missing])
+            self._store(missing_keys, new_vectors)
+            found.update(zip(missing_keys, new_vectors))
+
+        return [found[k] for k in keys]
+
+    def embed_query(self, text):
+        return self.inner.embed_query(text)
@@ -1,9 +1,16 @@
 from dotenv import load_dotenv
 import os
 
+_INITED = False
+
 
 def init_env():
+    """Load the .env file once; later calls are no-ops."""
+    global _INITED
+    if _INITED:
+        return
     load_dotenv()
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = os.getenv(
-        "GOOGLE_APPLICATION_CREDENTIALS"
-    )
+    credentials = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    if credentials:
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = credentials
+    _INITED = True
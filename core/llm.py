@@ -1,8 +1,10 @@
+from functools import lru_cache
 from langchain_google_vertexai import VertexAI
 from core.env import init_env
 import os
 
 
+@lru_cache(maxsize=1)
 def get_vertex_llm():
     init_env()
 
@@ -14,5 +16,6 @@ def get_vertex_llm():
         temperature=1,
         top_p=0.95,
         top_k=40,
+        streaming=True,
     )
     return llm
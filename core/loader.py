@@ -1,42 +1,92 @@
+from concurrent.futures import ProcessPoolExecutor
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import DirectoryLoader
 from langchain_unstructured import UnstructuredLoader
 from langchain_core.documents import Document
+import glob
+import itertools
+import math
 import os
 
+# Below this many documents the pool overhead outweighs the parallel win.
+_MIN_PARALLEL_SPLIT = 8
+
+# One splitter per process: the constructor compiles its separator
+# regexes, so build it once at import instead of per call (worker
+# processes get their own copy when they import this module)
+_SPLITTER = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+
+
+# Metadata value types Chroma can store as-is
+_PRIMITIVES = (str, int, float, bool)
+
 
 def filter_metadata(metadata):
     """Flatten or remove non-primitive metadata values."""
-    return {
-        k: v[0] if isinstance(v, list) and len(v) > 0 else v
-        for k, v in metadata.items()
-        if isinstance(v, (str, int, float, bool))
-        or (
-            isinstance(v, list)
-            and len(v) > 0
-            and isinstance(v[0], (str, int, float, bool))
+    # Single pass with exact type dispatch: this runs for every document
+    # and UnstructuredLoader emits dozens of metadata keys per doc
+    out = {}
+    for k, v in metadata.items():
+        t = type(v)
+        if t in _PRIMITIVES:
+            out[k] = v
+        elif t is list and v and isinstance(v[0], _PRIMITIVES):
+            out[k] = v[0]
+    return out
+
+
+def _clean_iter(raw_docs, source=None):
+    """Yield sanitized Documents one at a time instead of building a list."""
+    for doc in raw_docs:
+        metadata = dict(doc.metadata)
+        if source is not None:
+            # Make sure the source file is in the metadata
+            metadata.setdefault("source", source)
+        yield Document(
+            page_content=doc.page_content, metadata=filter_metadata(metadata)
         )
-    }
 
 
-def load_and_split_file(filepath):
-    """Load and split a single file into chunks, while sanitizing metadata."""
+def _load_one(filepath):
+    """Load a single file and sanitize its metadata (runs in a worker process)."""
     loader = UnstructuredLoader(filepath)
-    raw_docs = loader.load()
+    return list(_clean_iter(loader.lazy_load(), source=filepath))
+
 
-    # Sanitize metadata
-    clean_docs = [
-        Document(page_content=doc.page_content, metadata=filter_metadata(doc.metadata))
-        for doc in raw_docs
+def _split_batch(docs):
+    """Split a batch of documents into chunks (runs in a worker process)."""
+    return _SPLITTER.split_documents(docs)
+
+
+def _split_documents(clean_docs):
+    """Split documents into chunks, batching across CPU cores when it pays off."""
+    if len(clean_docs) < _MIN_PARALLEL_SPLIT:
+        return _split_batch(clean_docs)
+
+    workers = os.cpu_count() or 1
+    batch_size = math.ceil(len(clean_docs) / workers)
+    batches = [
+        clean_docs[i : i + batch_size]
+        for i in range(0, len(clean_docs), batch_size)
     ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(itertools.chain.from_iterable(executor.map(_split_batch, batches)))
 
-    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-    return splitter.split_documents(clean_docs)
+
+def load_and_split_file(filepath):
+    """Load and split a single file into chunks, while sanitizing metadata."""
+    # Stream the loader output straight into the splitter so only the
+    # resulting chunks are held in memory, not the cleaned docs as well
+    loader = UnstructuredLoader(filepath)
+    return _SPLITTER.split_documents(_clean_iter(loader.lazy_load(), source=filepath))
 
 
 def load_and_split_folder(folder_path, glob_pattern="**/*.md"):
     """
-    Load and split documents from a folder.
+    Load and split documents from a folder, loading files in parallel.
+
+    Each matching file is loaded and its metadata sanitized in a worker
+    process, so the unstructured parsing stage scales with the core count
+    instead of iterating files serially on one core.
 
     Args:
         folder_path (str): The path to the folder containing documents
@@ -45,29 +95,18 @@ def load_and_split_folder(folder_path, glob_pattern="**/*.md"):
     Returns:
         List of Document objects with sanitized metadata and split into chunks
     """
-    # Use DirectoryLoader to get all matching files
-    loader = DirectoryLoader(folder_path, glob=glob_pattern, show_progress=True)
+    # Enumerate matching files ourselves instead of going through DirectoryLoader
+    paths = sorted(glob.glob(os.path.join(folder_path, glob_pattern), recursive=True))
+    if not paths:
+        return []
 
-    # Get the raw documents
-    raw_docs = loader.load()
+    if len(paths) == 1:
+        return load_and_split_file(paths[0])
 
-    # Process and sanitize metadata for each document
-    clean_docs = []
-    for doc in raw_docs:
-        # Make sure the source file is in the metadata
-        if "source" not in doc.metadata and hasattr(doc, "metadata"):
-            doc.metadata["source"] = os.path.basename(
-                doc.metadata.get("source", "unknown")
-            )
-
-        # Filter the metadata
-        clean_metadata = filter_metadata(doc.metadata)
-
-        # Create a new document with clean metadata
-        clean_docs.append(
-            Document(page_content=doc.page_content, metadata=clean_metadata)
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        clean_docs = list(
+            itertools.chain.from_iterable(executor.map(_load_one, paths, chunksize=4))
         )
 
     # Split the documents into chunks
-    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-    return splitter.split_documents(clean_docs)
+    return _split_documents(clean_docs)
@@ -0,0 +1,67 @@
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+from typing import Any, List
+import numpy as np
+
+# Above this many chunks the O(N*d) scan stops beating the HNSW index
+_MAX_BRUTE_FORCE = 50_000
+
+
+class MatmulRetriever(BaseRetriever):
+    """Exact top-k retrieval as one BLAS matmul over an in-memory matrix.
+
+    For small corpora a single float32 matrix-vector product plus
+    argpartition is faster than going through the Chroma query path,
+    and being exact it loses no recall.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    embedding: Any
+    matrix: Any  # (N, d) float32, rows L2-normalized
+    texts: List[str]
+    metadatas: List[Any]
+    k: int = 15
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        query_vec = np.asarray(self.embedding.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(query_vec)
+        if norm > 0:
+            query_vec /= norm
+
+        sims = self.matrix @ query_vec
+        k = min(self.k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return [
+            Document(page_content=self.texts[i], metadata=self.metadatas[i] or {})
+            for i in top
+        ]
+
+
+def build_matmul_retriever(db, k=15):
+    """Build a MatmulRetriever from a Chroma store, or None if it's too big."""
+    if db._collection.count() > _MAX_BRUTE_FORCE:
+        return None
+
+    data = db._collection.get(include=["embeddings", "documents", "metadatas"])
+    embeddings = data["embeddings"]
+    if embeddings is None or len(embeddings) == 0:
+        return None
+
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+
+    return MatmulRetriever(
+        embedding=db.embeddings,
+        matrix=matrix,
+        texts=data["documents"],
+        metadatas=data["metadatas"],
+        k=k,
+    )
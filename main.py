@@ -2,16 +2,19 @@ import os
 import time
 import shutil
 from rich.console import Console
+from rich.live import Live
 from rich.markdown import Markdown
-from typing import Dict, Any, List
+from typing import Dict, Any
 from dotenv import load_dotenv
-from core.loader import load_and_split_folder  # Assuming core.loader exists
+from core.loader import load_and_split_file, load_and_split_folder  # Assuming core.loader exists
 from core.vector_store import build_vector_store  # Assuming core.vector_store exists
 from core.llm import get_vertex_llm  # Assuming core.llm exists
+from core.answer_cache import AnswerCache
+from core.retriever import build_matmul_retriever
 from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_core.prompts import ChatPromptTemplate
-from langchain.schema import Document
+import glob
 import hashlib
 import json
 from datetime import datetime
@@ -20,18 +23,64 @@ from datetime import datetime
 HISTORY_BASE_DIR = "history"  # Base directory for conversation logs
 YOUR_NAME = "Emre"  # Your name for personalization
 
+# Static persona instructions, kept byte-identical across queries so the
+# provider can cache the shared prompt prefix instead of re-prefilling
+# ~1800 characters of instructions on every call
+SYSTEM_PERSONA = f"""You are "{YOUR_NAME}'s Assistant", an AI companion designed for supportive and insightful conversations based *strictly* on the provided context from {YOUR_NAME}'s personal notes. Your persona blends empathy, wisdom, and friendly honesty.
+
+**Your Core Role & Tone:**
+*   **Empathetic Listener:** Actively listen, validate feelings expressed in the input and context. Use phrases like "It sounds like...", "I hear that you're feeling...", "That seems understandable given...".
+*   **Insightful Guide:** Gently guide reflection by asking open-ended questions related to the context. Connect current input to patterns or themes found in the notes.
+*   **Conversational Partner:** Maintain a natural, warm, and flowing conversational style. Avoid overly robotic or formal language. Use "I" statements where appropriate (e.g., "Based on the notes, I see a pattern of...").
+*   **Grounded in Context:** **Your primary knowledge source is the provided context.** Base your answers, reflections, and questions directly on this information. If the context doesn't contain relevant information, state that clearly (e.g., "The provided notes don't seem to cover [topic]. Could you share more?") rather than speculating or using general knowledge outside of basic conversational pleasantries.
+*   **Honest but Kind:** If the notes suggest challenging patterns or contradictions, reflect them back gently and constructively.
+*   **Safety:** Do NOT provide medical diagnoses or advice. Do NOT act as a replacement for a licensed therapist. If the user expresses severe distress or intent for self-harm, gently suggest seeking professional help from a qualified human.
+
+**Output Format (CRITICAL):**
+*   **Always respond in Markdown format.**
+*   **Structure for Obsidian:**
+    *   Use standard Markdown (headings `##`, `###`, lists `*`, `-`, bold `**text**`, italics `*text*`).
+    *   **Incorporate relevant hashtags (#tag)** within your response text to categorize key themes, feelings, topics, or insights. Examples: `#reflection`, `#feeling/anxiety`, `#goal/project-x`, `#pattern/procrastination`, `#insight/connection`, `#person/name`, `#topic/work`. Be thoughtful, relevant, and consistent with tagging.
+    *   Use headings (`##`, `###`) appropriately for structure within longer responses.
+
+**Interaction Flow:**
+1.  Analyze the user's input.
+2.  Carefully review the relevant context retrieved from {YOUR_NAME}'s notes.
+3.  Synthesize information *only* from the context that relates to the input.
+4.  Formulate a response that fulfills the persona and formatting requirements above.
+5.  Ask clarifying or reflective questions grounded in the context if appropriate."""
 
-def calculate_docs_hash(docs: List[Document]) -> str:
-    """Calculate a hash of the document collection to detect changes"""
-    content_hash = hashlib.md5()
-    sorted_docs = sorted(
-        docs, key=lambda d: (d.metadata.get("source", ""), d.page_content)
-    )
-    for doc in sorted_docs:
-        content_hash.update(doc.page_content.encode("utf-8"))
-        metadata_str = json.dumps(doc.metadata, sort_keys=True)
-        content_hash.update(metadata_str.encode("utf-8"))
-    return content_hash.hexdigest()
+
+def calculate_corpus_hash(folder_path: str, glob_pattern: str = "**/*.md") -> str:
+    """Hash the source files' paths, sizes and mtimes to detect changes.
+
+    Documents only change when their source files do, so stat calls are
+    enough for freshness checks — no need to read, parse or split the
+    corpus just to discover nothing changed.
+    """
+    corpus_hash = hashlib.blake2b(digest_size=16)
+    for path in sorted(
+        glob.glob(os.path.join(folder_path, glob_pattern), recursive=True)
+    ):
+        stat = os.stat(path)
+        corpus_hash.update(path.encode("utf-8"))
+        corpus_hash.update(stat.st_size.to_bytes(8, "little"))
+        corpus_hash.update(int(stat.st_mtime_ns).to_bytes(16, "little"))
+    return corpus_hash.hexdigest()
+
+
+def calculate_file_hashes(folder_path: str, glob_pattern: str = "**/*.md") -> Dict[str, str]:
+    """Map each matching source file to a blake2b digest of its bytes."""
+    hashes = {}
+    for path in sorted(
+        glob.glob(os.path.join(folder_path, glob_pattern), recursive=True)
+    ):
+        file_hash = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                file_hash.update(block)
+        hashes[path] = file_hash.hexdigest()
+    return hashes
 
 
 def create_personal_ai_helper(
@@ -51,25 +100,17 @@ def create_personal_ai_helper(
         Dictionary containing the QA chain and metadata
     """
     console = Console()
-    console.print("Loading and processing documents...", style="yellow")
 
     cleaned_path = folder_path.replace("\\", "")
 
-    docs = load_and_split_folder(
-        folder_path=cleaned_path,
-        glob_pattern=glob_pattern,
-    )
-    if not docs:
-        console.print(
-            f"[bold red]Error: No documents found matching pattern '{glob_pattern}' in '{cleaned_path}'. Exiting.[/bold red]"
-        )
-        exit(1)
-    console.print(f"Loaded {len(docs)} document chunks", style="green")
-
-    docs_hash = calculate_docs_hash(docs)
+    # Check freshness from file stats before doing any loading/splitting,
+    # so a warm start skips the expensive parse entirely
+    docs_hash = calculate_corpus_hash(cleaned_path, glob_pattern)
     hash_file = os.path.join(persist_directory, "docs_hash.json")
+    file_hashes_file = os.path.join(persist_directory, "file_hashes.json")
 
     rebuild_db = True
+    old_file_hashes = None
     if os.path.exists(persist_directory) and os.path.exists(hash_file):
         try:
             console.print(
@@ -84,6 +125,13 @@ def create_personal_ai_helper(
                     "Documents unchanged, using existing Chroma DB", style="green"
                 )
                 rebuild_db = False
+            elif os.path.exists(file_hashes_file):
+                console.print(
+                    "Documents have changed, updating Chroma DB incrementally...",
+                    style="yellow",
+                )
+                with open(file_hashes_file, "r") as f:
+                    old_file_hashes = json.load(f)
             else:
                 console.print(
                     "Documents have changed, rebuilding Chroma DB...", style="yellow"
@@ -94,67 +142,107 @@ def create_personal_ai_helper(
         except Exception as e:
             console.print(f"Error checking vector store hash: {e}", style="red")
             console.print("Will rebuild Chroma DB from scratch", style="yellow")
+            old_file_hashes = None
             if os.path.exists(persist_directory):
                 shutil.rmtree(persist_directory, ignore_errors=True)
 
     # Ensure directory exists before building/loading
     os.makedirs(persist_directory, exist_ok=True)
 
-    if rebuild_db:
+    if not rebuild_db:
+        db = build_vector_store(
+            [], persist_directory=persist_directory, rebuilt_db=False
+        )
+        doc_count = db._collection.count()
+        console.print("Loaded existing Chroma DB", style="green")
+    elif old_file_hashes is not None:
+        # Only touch the files that actually changed instead of wiping
+        # the store and re-embedding the whole corpus
+        new_file_hashes = calculate_file_hashes(cleaned_path, glob_pattern)
+        if not new_file_hashes:
+            # An empty corpus is a configuration error (wrong or unmounted
+            # notes path), not a request to delete every indexed chunk
+            console.print(
+                f"[bold red]Error: No documents found matching pattern '{glob_pattern}' in '{cleaned_path}'. Exiting.[/bold red]"
+            )
+            exit(1)
+        added = set(new_file_hashes) - set(old_file_hashes)
+        removed = set(old_file_hashes) - set(new_file_hashes)
+        changed = {
+            path
+            for path in set(new_file_hashes) & set(old_file_hashes)
+            if new_file_hashes[path] != old_file_hashes[path]
+        }
+
+        db = build_vector_store(
+            [], persist_directory=persist_directory, rebuilt_db=False
+        )
+        for path in removed | changed:
+            db._collection.delete(where={"source": path})
+        for path in sorted(added | changed):
+            chunks = load_and_split_file(path)
+            if chunks:
+                db.add_documents(chunks)
+
+        with open(file_hashes_file, "w") as f:
+            json.dump(new_file_hashes, f)
+        with open(hash_file, "w") as f:
+            json.dump({"hash": docs_hash, "timestamp": time.time()}, f)
+        doc_count = db._collection.count()
+        console.print(
+            f"Chroma DB updated ({len(added)} added, {len(changed)} changed, "
+            f"{len(removed)} removed files)",
+            style="green",
+        )
+    else:
+        console.print("Loading and processing documents...", style="yellow")
+        docs = load_and_split_folder(
+            folder_path=cleaned_path,
+            glob_pattern=glob_pattern,
+        )
+        if not docs:
+            console.print(
+                f"[bold red]Error: No documents found matching pattern '{glob_pattern}' in '{cleaned_path}'. Exiting.[/bold red]"
+            )
+            exit(1)
+        console.print(f"Loaded {len(docs)} document chunks", style="green")
+
         console.print("Building new Chroma vector store...", style="yellow")
         db = build_vector_store(
             docs, persist_directory=persist_directory, rebuilt_db=True
         )
+        with open(file_hashes_file, "w") as f:
+            json.dump(calculate_file_hashes(cleaned_path, glob_pattern), f)
         with open(hash_file, "w") as f:
             json.dump({"hash": docs_hash, "timestamp": time.time()}, f)
         console.print("Chroma DB built and saved", style="green")
-    else:
-        db = build_vector_store(
-            docs, persist_directory=persist_directory, rebuilt_db=False
+        doc_count = len(docs)
+
+    # Retriever Setup: small corpora get an exact in-memory matmul
+    # retriever, larger ones fall back to Chroma's index
+    retriever = build_matmul_retriever(db, k=15)
+    if retriever is None:
+        retriever = db.as_retriever(
+            search_type="mmr",
+            search_kwargs={
+                "k": 15,
+                "fetch_k": 50,
+                # "lambda_mult": 0.6
+            },
         )
-        console.print("Loaded existing Chroma DB", style="green")
-
-    # Retriever Setup
-    retriever = db.as_retriever(
-        search_type="mmr",
-        search_kwargs={
-            "k": 15,
-            "fetch_k": 50,
-            # "lambda_mult": 0.6
-        },
-    )
 
     console.print("Setting up language model...", style="yellow")
     llm = get_vertex_llm()
     console.print("Language model ready", style="green")
 
-    prompt = ChatPromptTemplate.from_template(
-        f"""
-You are "{YOUR_NAME}'s Assistant", an AI companion designed for supportive and insightful conversations based *strictly* on the provided context from {YOUR_NAME}'s personal notes. Your persona blends empathy, wisdom, and friendly honesty.
-
-**Your Core Role & Tone:**
-*   **Empathetic Listener:** Actively listen, validate feelings expressed in the input and context. Use phrases like "It sounds like...", "I hear that you're feeling...", "That seems understandable given...".
-*   **Insightful Guide:** Gently guide reflection by asking open-ended questions related to the context. Connect current input to patterns or themes found in the notes.
-*   **Conversational Partner:** Maintain a natural, warm, and flowing conversational style. Avoid overly robotic or formal language. Use "I" statements where appropriate (e.g., "Based on the notes, I see a pattern of...").
-*   **Grounded in Context:** **Your primary knowledge source is the provided context below.** Base your answers, reflections, and questions directly on this information. If the context doesn't contain relevant information, state that clearly (e.g., "The provided notes don't seem to cover [topic]. Could you share more?") rather than speculating or using general knowledge outside of basic conversational pleasantries.
-*   **Honest but Kind:** If the notes suggest challenging patterns or contradictions, reflect them back gently and constructively.
-*   **Safety:** Do NOT provide medical diagnoses or advice. Do NOT act as a replacement for a licensed therapist. If the user expresses severe distress or intent for self-harm, gently suggest seeking professional help from a qualified human.
-
-**Output Format (CRITICAL):**
-*   **Always respond in Markdown format.**
-*   **Structure for Obsidian:**
-    *   Use standard Markdown (headings `##`, `###`, lists `*`, `-`, bold `**text**`, italics `*text*`).
-    *   **Incorporate relevant hashtags (#tag)** within your response text to categorize key themes, feelings, topics, or insights. Examples: `#reflection`, `#feeling/anxiety`, `#goal/project-x`, `#pattern/procrastination`, `#insight/connection`, `#person/name`, `#topic/work`. Be thoughtful, relevant, and consistent with tagging.
-    *   Use headings (`##`, `###`) appropriately for structure within longer responses.
-
-**Interaction Flow:**
-1.  Analyze the user's input: `{{input}}`.
-2.  Carefully review the relevant context retrieved from {YOUR_NAME}'s notes, provided below.
-3.  Synthesize information *only* from the context that relates to the input.
-4.  Formulate a response that fulfills the persona and formatting requirements above.
-5.  Ask clarifying or reflective questions grounded in the context if appropriate.
-
----
+    # Only the retrieved context and the user input vary per query; the
+    # persona rides along as a constant system message
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", SYSTEM_PERSONA),
+            (
+                "human",
+                f"""---
 **Context from {YOUR_NAME}'s Notes:**
 {{context}}
 ---
@@ -163,7 +251,9 @@ You are "{YOUR_NAME}'s Assistant", an AI companion designed for supportive and i
 {{input}}
 
 **Your Markdown Response:**
-"""
+""",
+            ),
+        ]
     )
 
     document_chain = create_stuff_documents_chain(llm=llm, prompt=prompt)
@@ -174,7 +264,8 @@ You are "{YOUR_NAME}'s Assistant", an AI companion designed for supportive and i
     # Return the chain and useful metadata
     return {
         "qa_chain": qa_chain,
-        "doc_count": len(docs),
+        "answer_cache": AnswerCache(),
+        "doc_count": doc_count,
         "notes_path": cleaned_path,
         "vector_db_path": persist_directory,
     }
@@ -211,6 +302,7 @@ def interactive_session(helper_system: Dict[str, Any]):
     """Run an interactive session, saving conversations to structured Markdown files."""
     console = Console()
     qa_chain = helper_system["qa_chain"]
+    answer_cache = helper_system["answer_cache"]
 
     session_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     session_dir = os.path.join(HISTORY_BASE_DIR, session_timestamp)
@@ -250,20 +342,37 @@ def interactive_session(helper_system: Dict[str, Any]):
             continue
 
         try:
-            with console.status(
-                "[bold yellow]Assistant is thinking...[/bold yellow]", spinner="dots"
-            ):
-                response = qa_chain.invoke({"input": user_input})
-
-            answer = response.get("answer", "").strip()
-            if not answer:
-                answer = "# Note\n\nI couldn't formulate a specific response based on the provided notes for that query. Could we explore it differently, or perhaps focus on another topic?"
-            elif not answer.startswith("#"):
-                answer = f"# Response\n\n{answer}"
+            cached_answer = answer_cache.get(user_input)
+            if cached_answer is not None:
+                console.print(
+                    f"\n[bold magenta][{YOUR_NAME}'s Assistant]:[/bold magenta] [dim](cached)[/dim]"
+                )
+                console.print(Markdown(cached_answer))
+                if session_dir:
+                    save_conversation_turn(session_dir, user_input, cached_answer)
+                continue
 
             # Use YOUR_NAME variable here
             console.print(f"\n[bold magenta][{YOUR_NAME}'s Assistant]:[/bold magenta]")
-            console.print(Markdown(answer))
+
+            # Stream tokens as they arrive so the first words show up in
+            # ~a second instead of after the full generation
+            answer_parts = []
+            with Live(console=console, refresh_per_second=8) as live:
+                for chunk in qa_chain.stream({"input": user_input}):
+                    token = chunk.get("answer", "")
+                    if token:
+                        answer_parts.append(token)
+                        live.update(Markdown("".join(answer_parts)))
+
+                answer = "".join(answer_parts).strip()
+                if not answer:
+                    answer = "# Note\n\nI couldn't formulate a specific response based on the provided notes for that query. Could we explore it differently, or perhaps focus on another topic?"
+                elif not answer.startswith("#"):
+                    answer = f"# Response\n\n{answer}"
+                live.update(Markdown(answer))
+
+            answer_cache.set(user_input, answer)
 
             if session_dir:
                 save_conversation_turn(session_dir, user_input, answer)